@@ -3,6 +3,7 @@ import re
 import json
 import sys
 from collections import Counter
+from section_store import is_artifact_path, write_artifact
 
 def extract_title(page):
     """Extract the title as all blocks with the largest font size on the first page, joined and sorted by vertical position."""
@@ -234,6 +235,9 @@ def process_pdf(pdf_path, output_path):
     doc = fitz.open(pdf_path)
     title = extract_title(doc[0])
     outline = extract_headings(doc)
+    if is_artifact_path(output_path):
+        write_artifact(output_path, title, outline, has_text=False)
+        return
     result = {
         "title": title,
         "outline": outline
@@ -1,25 +1,27 @@
 import os
 import sys
+import argparse
 import json
 import subprocess
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 from datetime import datetime
+from section_selector import mmr_select
+from text_refiner import SentenceEmbeddingCache, refine_sections
+from section_store import SectionArtifact
 
 def run_HeadingExtraction(pdf_path, outline_path):
     # Run HeadingExtraction.py to extract headings
     subprocess.run([sys.executable, "HeadingExtraction.py", pdf_path, outline_path], cwd=os.path.dirname(__file__), check=True)
 
 def run_section_text_extractor(pdf_path, outline_path, section_texts_path):
-    # Run section_text_extractor.py to extract section texts
-    result = subprocess.run([sys.executable, "section_text_extractor.py", pdf_path, outline_path], cwd=os.path.dirname(__file__), capture_output=True, text=True, check=True)
-    with open(section_texts_path, "w", encoding="utf-8") as f:
-        f.write(result.stdout)
+    # Run section_text_extractor.py to write the section texts artifact
+    subprocess.run([sys.executable, "section_text_extractor.py", pdf_path, outline_path, section_texts_path], cwd=os.path.dirname(__file__), check=True)
 
 def load_input(input_json_path):
     with open(input_json_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def main(input_json_path, pdfs_dir, output_json_path, top_n=5):
+def main(input_json_path, pdfs_dir, output_json_path, top_n=5, relevance_weight=0.7, max_per_document=None, refined_max_tokens=120):
     # Load input
     input_data = load_input(input_json_path)
     persona = input_data["persona"]["role"]
@@ -47,10 +49,10 @@ def main(input_json_path, pdfs_dir, output_json_path, top_n=5):
 
     all_sections = []
     # For each document, extract headings and section texts
-    for doc in documents:
+    for doc_index, doc in enumerate(documents):
         pdf_path = os.path.join(pdfs_dir, doc["filename"])
-        outline_path = pdf_path + ".outline.json"
-        section_texts_path = pdf_path + ".sections.json"
+        outline_path = pdf_path + ".outline.bin"
+        section_texts_path = pdf_path + ".sections.bin"
 
         # Step 1: Extract headings
         run_HeadingExtraction(pdf_path, outline_path)
@@ -58,36 +60,44 @@ def main(input_json_path, pdfs_dir, output_json_path, top_n=5):
         # Step 2: Extract section texts
         run_section_text_extractor(pdf_path, outline_path, section_texts_path)
 
-        # Step 3: Load section texts
-        with open(section_texts_path, "r", encoding="utf-8") as f:
-            section_texts = json.load(f)
-
-        # Step 4: For each section, store info for scoring
-        for section in section_texts:
-            all_sections.append({
-                "document": doc["filename"],
-                "section_title": section["text"],
-                "page_number": section["page"] + 1,  # 1-based
-                "section_text": section["section_text"]
-            })
+        # Step 3/4: Load section texts from the artifact and store info for scoring
+        with SectionArtifact(section_texts_path) as section_texts:
+            for section in section_texts:
+                all_sections.append({
+                    "document": doc["filename"],
+                    "document_index": doc_index,
+                    "section_title": section["text"],
+                    "page_number": section["page"] + 1,  # 1-based
+                    "section_text": section["section_text"]
+                })
 
     # Step 5: Generate embeddings for all sections (use section_text for semantic match)
     section_embeddings = model.encode([s["section_text"] for s in all_sections])
 
-    # Step 6: Compute similarity and rank
+    # Step 6/7: Rank by similarity and select top N, skipping near-duplicate sections (MMR)
     if section_embeddings.size > 0 and len(all_sections) > 0:
-        similarities = util.cos_sim(query_embedding, section_embeddings)[0].cpu().tolist()
-        for i, sim in enumerate(similarities):
-            all_sections[i]["similarity"] = sim
+        selected = mmr_select(
+            query_embedding,
+            section_embeddings,
+            top_n,
+            relevance_weight=relevance_weight,
+            documents=[s["document_index"] for s in all_sections],
+            max_per_document=max_per_document,
+        )
     else:
         print("Warning: No sections found for similarity computation.")
+        selected = []
+    top_sections = []
+    for idx, sim in selected:
+        all_sections[idx]["similarity"] = sim
+        top_sections.append(all_sections[idx])
 
-    # Step 7: Sort and select top N
-    all_sections_sorted = sorted(all_sections, key=lambda x: x["similarity"], reverse=True)
-    top_sections = all_sections_sorted[:top_n]
+    # Step 7b: Refine top sections down to their most relevant sentences (one batched encode)
+    sentence_cache = SentenceEmbeddingCache(model)
+    refined_texts = refine_sections([s["section_text"] for s in top_sections], query_embedding, sentence_cache, refined_max_tokens)
 
     # Step 8: Fill output
-    for rank, sec in enumerate(top_sections, 1):
+    for rank, (sec, refined_text) in enumerate(zip(top_sections, refined_texts), 1):
         output["extracted_sections"].append({
             "document": sec["document"],
             "section_title": sec["section_title"],
@@ -96,7 +106,7 @@ def main(input_json_path, pdfs_dir, output_json_path, top_n=5):
         })
         output["subsection_analysis"].append({
             "document": sec["document"],
-            "refined_text": sec["section_text"],
+            "refined_text": refined_text,
             "page_number": sec["page_number"]
         })
 
@@ -105,7 +115,22 @@ def main(input_json_path, pdfs_dir, output_json_path, top_n=5):
         json.dump(output, f, ensure_ascii=False, indent=2)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 5:
-        print("Usage: python main_pipeline.py input_json_path pdfs_dir output_json_path top_n")
-        sys.exit(1)
-    main(sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    parser = argparse.ArgumentParser(usage="python main_pipeline.py input_json_path pdfs_dir output_json_path top_n [options]")
+    parser.add_argument("input_json_path")
+    parser.add_argument("pdfs_dir")
+    parser.add_argument("output_json_path")
+    parser.add_argument("top_n", type=int)
+    parser.add_argument("--relevance-weight", type=float, default=0.7,
+                        help="MMR trade-off between relevance (1.0) and diversity (0.0)")
+    parser.add_argument("--max-per-document", type=int, default=None,
+                        help="maximum number of selected sections from any one document")
+    parser.add_argument("--refined-max-tokens", type=int, default=120,
+                        help="approximate word budget for each refined_text")
+    args = parser.parse_args()
+    if not 0.0 <= args.relevance_weight <= 1.0:
+        parser.error("--relevance-weight must be between 0 and 1")
+    if args.max_per_document is not None and args.max_per_document < 1:
+        parser.error("--max-per-document must be at least 1")
+    main(args.input_json_path, args.pdfs_dir, args.output_json_path, args.top_n,
+         relevance_weight=args.relevance_weight, max_per_document=args.max_per_document,
+         refined_max_tokens=args.refined_max_tokens)
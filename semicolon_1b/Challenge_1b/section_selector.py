@@ -0,0 +1,94 @@
+import numpy as np
+
+def normalize_rows(embeddings):
+    """L2-normalize embeddings row-wise so dot products are cosine similarities."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings[None, :]
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+def candidate_pool(relevance, pool_size):
+    """Return indices of the pool_size most relevant items, best first, without a full sort."""
+    n = relevance.shape[0]
+    if pool_size < n:
+        pool = np.argpartition(-relevance, pool_size - 1)[:pool_size]
+    else:
+        pool = np.arange(n)
+    return pool[np.argsort(-relevance[pool], kind="stable")]
+
+def capped_candidates(relevance, documents, max_per_document):
+    """Return indices of each document's max_per_document most relevant sections."""
+    doc_ids = np.asarray(documents)
+    if not np.issubdtype(doc_ids.dtype, np.integer):
+        ids = {}
+        doc_ids = np.array([ids.setdefault(d, len(ids)) for d in documents])
+    order = np.argsort(doc_ids, kind="stable")
+    bounds = np.flatnonzero(np.diff(doc_ids[order])) + 1
+    kept = []
+    for group in np.split(order, bounds):
+        if len(group) > max_per_document:
+            group = group[np.argpartition(-relevance[group], max_per_document - 1)[:max_per_document]]
+        kept.append(group)
+    return np.concatenate(kept)
+
+def mmr_over_pool(pool_relevance, pool_sim, top_n, relevance_weight):
+    """Run the greedy MMR loop over a candidate pool; returns positions within the pool."""
+    available = np.ones(len(pool_relevance), dtype=bool)
+    # Redundancy against the selected set; zero until the first pick
+    max_sim = np.zeros(len(pool_relevance), dtype=np.float32)
+    selected = []
+    while len(selected) < top_n and available.any():
+        scores = relevance_weight * pool_relevance - (1 - relevance_weight) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_sim = np.maximum(max_sim, pool_sim[best]) if len(selected) > 1 else pool_sim[best].copy()
+    return selected
+
+def mmr_select(query_embedding, section_embeddings, top_n, relevance_weight=0.7,
+               pool_size=None, documents=None, max_per_document=None):
+    """Pick top_n sections by Maximal Marginal Relevance.
+
+    Each step takes the candidate maximizing
+    relevance_weight * sim(query, c) - (1 - relevance_weight) * max sim(c, selected).
+    relevance_weight=1.0 reduces to plain similarity ranking. If documents (one name
+    or integer id per section; ids are faster) and max_per_document are given, at most
+    that many sections are taken from any single document.
+
+    Returns a list of (section_index, similarity) tuples in selection order.
+    """
+    if max_per_document is not None:
+        if max_per_document < 1:
+            raise ValueError(f"max_per_document must be at least 1, got {max_per_document}")
+        if documents is None:
+            raise ValueError("max_per_document requires documents")
+    if top_n <= 0 or len(section_embeddings) == 0:
+        return []
+
+    # Cosine relevance without normalizing (and copying) the whole embedding matrix
+    sections = np.asarray(section_embeddings, dtype=np.float32)
+    norms = np.sqrt(np.einsum("ij,ij->i", sections, sections))
+    norms[norms == 0] = 1.0
+    relevance = (sections @ normalize_rows(query_embedding)[0]) / norms
+
+    # Apply the per-document cap up front, so any pool of at least top_n
+    # candidates can yield top_n picks and MMR runs exactly once
+    if max_per_document is not None:
+        candidates = capped_candidates(relevance, documents, max_per_document)
+    else:
+        candidates = np.arange(len(relevance))
+    top_n = min(top_n, len(candidates))
+
+    # Only the best pool_size candidates can realistically be picked, so MMR runs there
+    if pool_size is None:
+        pool_size = top_n * 10
+    pool = candidates[candidate_pool(relevance[candidates], max(pool_size, top_n))]
+    pool_relevance = relevance[pool]
+    pool_sections = sections[pool] / norms[pool, None]
+    pool_sim = pool_sections @ pool_sections.T
+
+    picks = mmr_over_pool(pool_relevance, pool_sim, top_n, relevance_weight)
+    return [(int(pool[i]), float(pool_relevance[i])) for i in picks]
@@ -0,0 +1,168 @@
+"""Compact binary artifact for a document's outline and section texts.
+
+Layout (little-endian), one file per document:
+    header   magic b"SSEC", version (u16), flags (u16), section count (u32),
+             title length (u32), blob offset (u64)
+    index    one entry per section: level (u16), page (u32),
+             heading offset (u64), heading length (u32),
+             text offset (u64), text length (u32)
+    blobs    UTF-8 title followed by each heading and section text
+
+Offsets in the index are relative to the blob offset. Outline artifacts
+(written by HeadingExtraction.py) have empty section texts and no HAS_TEXT flag;
+sections artifacts (written by section_text_extractor.py) set it.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"SSEC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQ")
+HAS_TEXT = 0x1
+ENTRY = struct.Struct("<HIQIQI")
+
+def level_to_int(level):
+    if not (level.startswith("H") and level[1:].isascii() and level[1:].isdigit() and 0 <= int(level[1:]) <= 0xFFFF):
+        raise ValueError(f"cannot encode heading level {level!r}; expected H<number>")
+    return int(level[1:])
+
+def int_to_level(value):
+    return f"H{value}"
+
+def is_artifact_path(path):
+    return path.endswith(".bin")
+
+def write_artifact(path, title, sections, has_text):
+    """Write sections (dicts with level, text, page and, if has_text, section_text) to path."""
+    title_bytes = title.encode("utf-8")
+    blobs = [title_bytes]
+    offset = len(title_bytes)
+    entries = []
+    for s in sections:
+        heading = s["text"].encode("utf-8")
+        text = s["section_text"].encode("utf-8") if has_text else b""
+        entries.append(ENTRY.pack(level_to_int(s["level"]), s["page"],
+                                  offset, len(heading), offset + len(heading), len(text)))
+        blobs.append(heading)
+        blobs.append(text)
+        offset += len(heading) + len(text)
+
+    flags = HAS_TEXT if has_text else 0
+    blob_offset = HEADER.size + ENTRY.size * len(entries)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, len(entries), len(title_bytes), blob_offset))
+        f.writelines(entries)
+        f.writelines(blobs)
+
+class SectionArtifact:
+    """Memory-mapped reader; headings and section texts are decoded only when accessed."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = None
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} is too small to be a section artifact")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self._flags, self._count, self._title_len, self._blob_offset = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a section artifact")
+            if version != VERSION:
+                raise ValueError(f"{path} has unsupported artifact version {version}")
+            if size < HEADER.size + self._count * ENTRY.size:
+                raise ValueError(f"{path} is truncated: index for {self._count} sections does not fit")
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i):
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return ENTRY.unpack_from(self._mm, HEADER.size + i * ENTRY.size)
+
+    def _slice(self, offset, length):
+        start = self._blob_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    @property
+    def has_text(self):
+        return bool(self._flags & HAS_TEXT)
+
+    @property
+    def title(self):
+        return self._slice(0, self._title_len)
+
+    def level(self, i):
+        return int_to_level(self._entry(i)[0])
+
+    def page(self, i):
+        return self._entry(i)[1]
+
+    def heading(self, i):
+        _, _, off, length, _, _ = self._entry(i)
+        return self._slice(off, length)
+
+    def section_text(self, i):
+        _, _, _, _, off, length = self._entry(i)
+        return self._slice(off, length)
+
+    def section(self, i):
+        level, page, h_off, h_len, t_off, t_len = self._entry(i)
+        return {
+            "level": int_to_level(level),
+            "text": self._slice(h_off, h_len),
+            "page": page,
+            "section_text": self._slice(t_off, t_len)
+        }
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self.section(i)
+
+def artifact_to_json(artifact_path):
+    """Return the artifact in the JSON shape of the old .outline.json/.sections.json files."""
+    with SectionArtifact(artifact_path) as artifact:
+        sections = list(artifact)
+        title = artifact.title
+        has_text = artifact.has_text
+    if not has_text:
+        return {"title": title, "outline": [{k: s[k] for k in ("level", "text", "page")} for s in sections]}
+    return sections
+
+def json_to_artifact(json_path, artifact_path):
+    """Convert an .outline.json ({"title", "outline"}) or .sections.json (list) file."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        write_artifact(artifact_path, data.get("title", ""), data["outline"], has_text=False)
+    else:
+        write_artifact(artifact_path, "", data, has_text=True)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-json", "from-json"):
+        print("Usage: python section_store.py to-json artifact.bin output.json")
+        print("       python section_store.py from-json input.json artifact.bin")
+        sys.exit(1)
+    if sys.argv[1] == "to-json":
+        with open(sys.argv[3], "w", encoding="utf-8") as f:
+            json.dump(artifact_to_json(sys.argv[2]), f, ensure_ascii=False, indent=2)
+    else:
+        json_to_artifact(sys.argv[2], sys.argv[3])
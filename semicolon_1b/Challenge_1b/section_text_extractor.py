@@ -1,8 +1,12 @@
 import fitz
 import json
 import sys
+from section_store import SectionArtifact, is_artifact_path, write_artifact
 
 def load_outline(outline_path):
+    if is_artifact_path(outline_path):
+        with SectionArtifact(outline_path) as artifact:
+            return [{"level": artifact.level(i), "text": artifact.heading(i), "page": artifact.page(i)} for i in range(len(artifact))]
     with open(outline_path, "r", encoding="utf-8") as f:
         data = json.load(f)
     return data["outline"]
@@ -43,11 +47,18 @@ def extract_section_texts(pdf_path, outline):
     return section_texts
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python section_text_extractor.py input.pdf outline.json")
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python section_text_extractor.py input.pdf outline.json [sections.json|sections.bin]")
         sys.exit(1)
     pdf_path = sys.argv[1]
     outline_path = sys.argv[2]
     outline = load_outline(outline_path)
     section_texts = extract_section_texts(pdf_path, outline)
-    print(json.dumps(section_texts, ensure_ascii=False, indent=2))
+    if len(sys.argv) == 4 and is_artifact_path(sys.argv[3]):
+        # Write the binary artifact directly instead of printing JSON
+        write_artifact(sys.argv[3], "", section_texts, has_text=True)
+    elif len(sys.argv) == 4:
+        with open(sys.argv[3], "w", encoding="utf-8") as f:
+            json.dump(section_texts, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(section_texts, ensure_ascii=False, indent=2))
@@ -0,0 +1,86 @@
+import re
+import hashlib
+import numpy as np
+from section_selector import normalize_rows
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[^a-z])|\s*[•\uf0b7]\s*')
+# "o" sub-bullets at the start of a line, as PDF lists render them
+SUB_BULLET = re.compile(r'^[ \t]*o[ \t]+', re.MULTILINE)
+
+def split_sentences(text):
+    """Split PDF section text into sentences, joining lines that were wrapped mid-sentence."""
+    text = SUB_BULLET.sub('• ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    if not text:
+        return []
+    return [s.strip() for s in SENTENCE_END.split(text) if len(s.strip()) > 3]
+
+def count_tokens(sentence):
+    """Approximate token count by whitespace-separated words."""
+    return len(sentence.split())
+
+class SentenceEmbeddingCache:
+    """Normalized sentence embeddings keyed by a hash of the sentence text."""
+
+    def __init__(self, model):
+        self.model = model
+        self.embeddings = {}
+
+    @staticmethod
+    def key(sentence):
+        return hashlib.sha1(sentence.encode("utf-8")).hexdigest()
+
+    def encode(self, sentences):
+        """Return embeddings for sentences, encoding all uncached ones in a single batch."""
+        keys = [self.key(s) for s in sentences]
+        missing = {}
+        for k, s in zip(keys, sentences):
+            if k not in self.embeddings and k not in missing:
+                missing[k] = s
+        if missing:
+            encoded = normalize_rows(self.model.encode(list(missing.values())))
+            for k, emb in zip(missing.keys(), encoded):
+                self.embeddings[k] = emb
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([self.embeddings[k] for k in keys])
+
+def refine_sections(section_texts, query_embedding, cache, max_tokens=120):
+    """Reduce each section text to its most query-relevant sentences.
+
+    Sentences of all sections are encoded together, then for each section the
+    best-scoring sentences are kept until max_tokens is reached and returned in
+    their original order. The best sentence is always kept, cut to max_tokens words
+    if it alone is over budget.
+    """
+    split = [split_sentences(t) for t in section_texts]
+    flat = [s for sentences in split for s in sentences]
+    if not flat:
+        return [t.strip() for t in section_texts]
+
+    query = normalize_rows(query_embedding)[0]
+    scores = cache.encode(flat) @ query
+
+    refined = []
+    offset = 0
+    for text, sentences in zip(section_texts, split):
+        if not sentences:
+            refined.append(text.strip())
+            continue
+        section_scores = scores[offset:offset + len(sentences)]
+        offset += len(sentences)
+
+        keep = []
+        used = 0
+        for i in np.argsort(-section_scores, kind="stable"):
+            sentence = sentences[i]
+            tokens = count_tokens(sentence)
+            if keep and used + tokens > max_tokens:
+                continue
+            if tokens > max_tokens:
+                sentence = " ".join(sentence.split()[:max_tokens])
+                tokens = max_tokens
+            keep.append((int(i), sentence))
+            used += tokens
+        refined.append(" ".join(sentence for _, sentence in sorted(keep)))
+    return refined